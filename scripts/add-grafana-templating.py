@@ -4,117 +4,148 @@ Add Grafana Templating to Dashboard
 Adds template variables for multi-instance support
 """
 
-import json
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from dashboard_json import load_json, dump_json  # noqa: E402
+
+EXPORTER_JOB = 'job="solr-exporter"'
+
+# Template variables for instance, job and core filtering
+TEMPLATE_VARIABLES = [
+    {
+        "current": {
+            "selected": False,
+            "text": "All",
+            "value": "$__all"
+        },
+        "datasource": "Prometheus",
+        "definition": "label_values(up{job=\"solr-exporter\"}, instance)",
+        "hide": 0,
+        "includeAll": True,
+        "label": "Instance",
+        "multi": True,
+        "name": "instance",
+        "options": [],
+        "query": {
+            "query": "label_values(up{job=\"solr-exporter\"}, instance)",
+            "refId": "StandardVariableQuery"
+        },
+        "refresh": 1,
+        "regex": "",
+        "skipUrlSync": False,
+        "sort": 1,
+        "type": "query"
+    },
+    {
+        "current": {
+            "selected": False,
+            "text": "solr-exporter",
+            "value": "solr-exporter"
+        },
+        "datasource": "Prometheus",
+        "definition": "label_values(up, job)",
+        "hide": 0,
+        "includeAll": False,
+        "label": "Job",
+        "multi": False,
+        "name": "job",
+        "options": [],
+        "query": {
+            "query": "label_values(up, job)",
+            "refId": "StandardVariableQuery"
+        },
+        "refresh": 1,
+        "regex": ".*solr.*",
+        "skipUrlSync": False,
+        "sort": 0,
+        "type": "query"
+    },
+    {
+        "allValue": "",
+        "current": {
+            "selected": False,
+            "text": "All",
+            "value": "$__all"
+        },
+        "datasource": "Prometheus",
+        "definition": "label_values(solr_metrics_core_query_requests_total, core)",
+        "hide": 0,
+        "includeAll": True,
+        "label": "Core",
+        "multi": True,
+        "name": "core",
+        "options": [],
+        "query": {
+            "query": "label_values(solr_metrics_core_query_requests_total, core)",
+            "refId": "StandardVariableQuery"
+        },
+        "refresh": 1,
+        "regex": "",
+        "skipUrlSync": False,
+        "sort": 1,
+        "type": "query"
+    }
+]
+
+
+def rewrite_expr(expr):
+    """
+    Rewrite a PromQL expression to use the $job, $instance and $core variables.
+
+    - job="solr-exporter" becomes job="$job", plus instance=~"$instance"
+      when the expression has no instance matcher yet
+    - core metrics without a core matcher get core=~"$core" appended to
+      every label set
+
+    The expression is scanned once with str.find; untouched expressions
+    are returned as-is.
+    """
+    if EXPORTER_JOB in expr:
+        job_repl = 'job="$job"' if 'instance=' in expr else 'job="$job",instance=~"$instance"'
+    else:
+        job_repl = None
+    add_core = 'core=' not in expr and 'solr_metrics_core' in expr
+
+    if job_repl is None and not add_core:
+        return expr
+
+    out = []
+    pos = 0
+    job_at = expr.find(EXPORTER_JOB) if job_repl else -1
+    brace_at = expr.find('}') if add_core else -1
+
+    while job_at >= 0 or brace_at >= 0:
+        if job_at >= 0 and (brace_at < 0 or job_at < brace_at):
+            out.append(expr[pos:job_at])
+            out.append(job_repl)
+            pos = job_at + len(EXPORTER_JOB)
+            job_at = expr.find(EXPORTER_JOB, pos)
+        else:
+            out.append(expr[pos:brace_at])
+            out.append(',core=~"$core"}')
+            pos = brace_at + 1
+            brace_at = expr.find('}', pos)
+
+    out.append(expr[pos:])
+    return ''.join(out)
+
+
 dashboard_path = sys.argv[1] if len(sys.argv) > 1 else 'monitoring/grafana/dashboards/solr-dashboard.json'
 
 # Read dashboard
-with open(dashboard_path, 'r') as f:
-    dashboard = json.load(f)
+dashboard = load_json(dashboard_path)
 
 # Add templating section
-dashboard['templating'] = {
-    "list": [
-        {
-            "current": {
-                "selected": False,
-                "text": "All",
-                "value": "$__all"
-            },
-            "datasource": "Prometheus",
-            "definition": "label_values(up{job=\"solr-exporter\"}, instance)",
-            "hide": 0,
-            "includeAll": True,
-            "label": "Instance",
-            "multi": True,
-            "name": "instance",
-            "options": [],
-            "query": {
-                "query": "label_values(up{job=\"solr-exporter\"}, instance)",
-                "refId": "StandardVariableQuery"
-            },
-            "refresh": 1,
-            "regex": "",
-            "skipUrlSync": False,
-            "sort": 1,
-            "type": "query"
-        },
-        {
-            "current": {
-                "selected": False,
-                "text": "solr-exporter",
-                "value": "solr-exporter"
-            },
-            "datasource": "Prometheus",
-            "definition": "label_values(up, job)",
-            "hide": 0,
-            "includeAll": False,
-            "label": "Job",
-            "multi": False,
-            "name": "job",
-            "options": [],
-            "query": {
-                "query": "label_values(up, job)",
-                "refId": "StandardVariableQuery"
-            },
-            "refresh": 1,
-            "regex": ".*solr.*",
-            "skipUrlSync": False,
-            "sort": 0,
-            "type": "query"
-        },
-        {
-            "allValue": "",
-            "current": {
-                "selected": False,
-                "text": "All",
-                "value": "$__all"
-            },
-            "datasource": "Prometheus",
-            "definition": "label_values(solr_metrics_core_query_requests_total, core)",
-            "hide": 0,
-            "includeAll": True,
-            "label": "Core",
-            "multi": True,
-            "name": "core",
-            "options": [],
-            "query": {
-                "query": "label_values(solr_metrics_core_query_requests_total, core)",
-                "refId": "StandardVariableQuery"
-            },
-            "refresh": 1,
-            "regex": "",
-            "skipUrlSync": False,
-            "sort": 1,
-            "type": "query"
-        }
-    ]
-}
+dashboard['templating'] = {"list": TEMPLATE_VARIABLES}
 
 # Update all panel queries to use template variables
 for panel in dashboard.get('panels', []):
     if 'targets' in panel:
         for target in panel['targets']:
             if 'expr' in target:
-                # Add instance filter if not present
-                expr = target['expr']
-                if 'instance=' not in expr and 'job="solr-exporter"' in expr:
-                    expr = expr.replace('job="solr-exporter"', 'job="$job",instance=~"$instance"')
-                elif 'job="solr-exporter"' in expr:
-                    expr = expr.replace('job="solr-exporter"', 'job="$job"')
-
-                # Add core filter where applicable
-                if 'core=' not in expr and 'solr_metrics_core' in expr:
-                    if 'core="' in expr:
-                        # Already has hardcoded core, replace it
-                        import re
-                        expr = re.sub(r'core="[^"]*"', 'core=~"$core"', expr)
-                    elif '}' in expr:
-                        # Add core filter before closing brace
-                        expr = expr.replace('}', ',core=~"$core"}')
-
-                target['expr'] = expr
+                target['expr'] = rewrite_expr(target['expr'])
 
 # Update title to show it supports multiple instances
 dashboard['title'] = 'Solr Monitoring (Multi-Instance)'
@@ -124,8 +155,7 @@ dashboard['description'] = 'Solr performance monitoring dashboard with support f
 dashboard['version'] = dashboard.get('version', 0) + 1
 
 # Write updated dashboard
-with open(dashboard_path, 'w') as f:
-    json.dump(dashboard, f, indent=2)
+dump_json(dashboard, dashboard_path)
 
 print(f"✓ Added templating to {dashboard_path}")
 print("  - Instance variable (multi-select)")
@@ -7,282 +7,317 @@ Adds detailed query performance metrics to existing Solr dashboard
 import json
 import sys
 import os
-from datetime import datetime
+import shutil
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from dashboard_json import load_json, dump_json  # noqa: E402
 
 DASHBOARD_PATH = "monitoring/grafana/dashboards/solr-dashboard.json"
 
+# Panel templates, serialized once and cloned per use with json.loads
+
+# Row header for the Query Performance section
+QUERY_ROW_TEMPLATE = json.dumps({
+    "collapsed": False,
+    "gridPos": {"h": 1, "w": 24, "x": 0, "y": 0},
+    "id": 0,
+    "panels": [],
+    "title": "Query Performance Analysis",
+    "type": "row"
+})
+
+# Panel 1: Query Latency Percentiles (p50, p95, p99)
+PANEL_LATENCY_TEMPLATE = json.dumps({
+    "id": 0,
+    "gridPos": {"h": 8, "w": 12, "x": 0, "y": 0},
+    "type": "graph",
+    "title": "Query Latency Percentiles",
+    "description": "Query response time distribution (p50, p95, p99)",
+    "targets": [
+        {
+            "expr": 'histogram_quantile(0.50, rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance"}[5m]))',
+            "legendFormat": "p50 (median)",
+            "refId": "A"
+        },
+        {
+            "expr": 'histogram_quantile(0.95, rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance"}[5m]))',
+            "legendFormat": "p95",
+            "refId": "B"
+        },
+        {
+            "expr": 'histogram_quantile(0.99, rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance"}[5m]))',
+            "legendFormat": "p99",
+            "refId": "C"
+        }
+    ],
+    "yaxes": [
+        {"format": "ms", "label": "Latency"},
+        {"format": "short"}
+    ],
+    "xaxis": {"mode": "time", "show": True},
+    "lines": True,
+    "fill": 0,
+    "linewidth": 2,
+    "pointradius": 2,
+    "points": False,
+    "bars": False,
+    "stack": False,
+    "percentage": False,
+    "legend": {
+        "show": True,
+        "values": True,
+        "current": True,
+        "max": True,
+        "alignAsTable": True
+    },
+    "nullPointMode": "null",
+    "tooltip": {"shared": True, "sort": 0, "value_type": "individual"},
+    "thresholds": [
+        {"value": 100, "colorMode": "critical", "op": "gt", "fill": True, "line": True},
+        {"value": 500, "colorMode": "custom", "op": "gt", "fill": True, "line": True, "fillColor": "rgba(234, 112, 112, 0.2)", "lineColor": "rgb(234, 112, 112)"}
+    ]
+})
+
+# Panel 2: Slow Query Count (>1s)
+PANEL_SLOW_TEMPLATE = json.dumps({
+    "id": 0,
+    "gridPos": {"h": 8, "w": 12, "x": 12, "y": 0},
+    "type": "graph",
+    "title": "Slow Queries (>1s)",
+    "description": "Number of queries taking longer than 1 second",
+    "targets": [
+        {
+            "expr": 'sum(rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance",le="1000"}[5m])) by (core)',
+            "legendFormat": "{{core}} - queries >1s",
+            "refId": "A"
+        }
+    ],
+    "yaxes": [
+        {"format": "reqps", "label": "Queries/sec"},
+        {"format": "short"}
+    ],
+    "xaxis": {"mode": "time", "show": True},
+    "lines": True,
+    "fill": 2,
+    "linewidth": 2,
+    "pointradius": 2,
+    "points": False,
+    "bars": False,
+    "stack": False,
+    "percentage": False,
+    "legend": {
+        "show": True,
+        "values": True,
+        "current": True,
+        "total": True,
+        "alignAsTable": True
+    },
+    "nullPointMode": "null",
+    "tooltip": {"shared": True, "sort": 2, "value_type": "individual"},
+    "alert": {
+        "name": "High Slow Query Rate",
+        "conditions": [
+            {
+                "evaluator": {"params": [10], "type": "gt"},
+                "operator": {"type": "and"},
+                "query": {"params": ["A", "5m", "now"]},
+                "reducer": {"params": [], "type": "avg"},
+                "type": "query"
+            }
+        ],
+        "executionErrorState": "alerting",
+        "frequency": "1m",
+        "handler": 1,
+        "message": "Slow query rate is high",
+        "noDataState": "no_data",
+        "notifications": []
+    }
+})
+
+# Panel 3: Query Rate by Type
+PANEL_RATE_TEMPLATE = json.dumps({
+    "id": 0,
+    "gridPos": {"h": 8, "w": 12, "x": 0, "y": 0},
+    "type": "graph",
+    "title": "Query Rate by Handler",
+    "description": "Queries per second by request handler",
+    "targets": [
+        {
+            "expr": 'sum(rate(solr_metrics_core_query_requests_total{core=~"$core",instance=~"$instance"}[5m])) by (handler)',
+            "legendFormat": "{{handler}}",
+            "refId": "A"
+        }
+    ],
+    "yaxes": [
+        {"format": "reqps", "label": "Queries/sec"},
+        {"format": "short"}
+    ],
+    "xaxis": {"mode": "time", "show": True},
+    "lines": True,
+    "fill": 1,
+    "linewidth": 2,
+    "pointradius": 2,
+    "points": False,
+    "bars": False,
+    "stack": True,
+    "percentage": False,
+    "legend": {
+        "show": True,
+        "values": True,
+        "current": True,
+        "total": True,
+        "alignAsTable": True
+    },
+    "nullPointMode": "null as zero",
+    "tooltip": {"shared": True, "sort": 2, "value_type": "individual"}
+})
+
+# Panel 4: Query Cache Hit Ratio
+PANEL_CACHE_TEMPLATE = json.dumps({
+    "id": 0,
+    "gridPos": {"h": 8, "w": 12, "x": 12, "y": 0},
+    "type": "stat",
+    "title": "Query Cache Hit Ratio",
+    "description": "Percentage of queries served from cache",
+    "targets": [
+        {
+            "expr": '100 * (rate(solr_metrics_core_query_result_cache_hits_total{core=~"$core",instance=~"$instance"}[5m]) / (rate(solr_metrics_core_query_result_cache_hits_total{core=~"$core",instance=~"$instance"}[5m]) + rate(solr_metrics_core_query_result_cache_misses_total{core=~"$core",instance=~"$instance"}[5m])))',
+            "legendFormat": "{{core}}",
+            "refId": "A"
+        }
+    ],
+    "options": {
+        "reduceOptions": {
+            "values": False,
+            "calcs": ["lastNotNull"],
+            "fields": ""
+        },
+        "orientation": "auto",
+        "textMode": "value_and_name",
+        "colorMode": "value",
+        "graphMode": "area",
+        "justifyMode": "auto"
+    },
+    "fieldConfig": {
+        "defaults": {
+            "unit": "percent",
+            "decimals": 1,
+            "min": 0,
+            "max": 100,
+            "thresholds": {
+                "mode": "absolute",
+                "steps": [
+                    {"value": 0, "color": "red"},
+                    {"value": 50, "color": "yellow"},
+                    {"value": 80, "color": "green"}
+                ]
+            }
+        }
+    }
+})
+
+# Panel 5: Average Query Time Trend
+PANEL_TREND_TEMPLATE = json.dumps({
+    "id": 0,
+    "gridPos": {"h": 8, "w": 24, "x": 0, "y": 0},
+    "type": "graph",
+    "title": "Average Query Time Trend",
+    "description": "Average query execution time over time by core",
+    "targets": [
+        {
+            "expr": 'rate(solr_metrics_core_query_time_sum{core=~"$core",instance=~"$instance"}[5m]) / rate(solr_metrics_core_query_requests_total{core=~"$core",instance=~"$instance"}[5m])',
+            "legendFormat": "{{core}}",
+            "refId": "A"
+        }
+    ],
+    "yaxes": [
+        {"format": "ms", "label": "Avg Time"},
+        {"format": "short"}
+    ],
+    "xaxis": {"mode": "time", "show": True},
+    "lines": True,
+    "fill": 0,
+    "linewidth": 2,
+    "pointradius": 2,
+    "points": False,
+    "bars": False,
+    "stack": False,
+    "percentage": False,
+    "legend": {
+        "show": True,
+        "values": True,
+        "current": True,
+        "avg": True,
+        "max": True,
+        "alignAsTable": True
+    },
+    "nullPointMode": "null",
+    "tooltip": {"shared": True, "sort": 0, "value_type": "individual"},
+    "thresholds": [
+        {"value": 50, "colorMode": "custom", "op": "gt", "fill": False, "line": True, "lineColor": "rgba(245, 150, 40, 0.8)"},
+        {"value": 100, "colorMode": "custom", "op": "gt", "fill": False, "line": True, "lineColor": "rgba(234, 112, 112, 0.8)"}
+    ]
+})
+
+def new_panel(template, panel_id, y):
+    """Create a panel from a serialized template at the given id and row"""
+    panel = json.loads(template)
+    panel["id"] = panel_id
+    panel["gridPos"]["y"] = y
+    return panel
+
 def add_query_performance_panels(dashboard):
     """Add query performance panels to dashboard"""
 
     # Get existing panels to determine next ID and position
-    existing_panels = dashboard.get("panels", [])
-    next_id = max([p.get("id", 0) for p in existing_panels], default=0) + 1
-    next_y = max([p.get("gridPos", {}).get("y", 0) + p.get("gridPos", {}).get("h", 0)
-                  for p in existing_panels], default=0)
+    max_id = 0
+    max_y = 0
+    for p in dashboard.get("panels", []):
+        panel_id = p.get("id", 0)
+        if panel_id > max_id:
+            max_id = panel_id
+        grid = p.get("gridPos", {})
+        bottom = grid.get("y", 0) + grid.get("h", 0)
+        if bottom > max_y:
+            max_y = bottom
+
+    next_id = max_id + 1
+    next_y = max_y
 
     # Create new row for Query Performance
-    query_row = {
-        "collapsed": False,
-        "gridPos": {"h": 1, "w": 24, "x": 0, "y": next_y},
-        "id": next_id,
-        "panels": [],
-        "title": "Query Performance Analysis",
-        "type": "row"
-    }
+    query_row = new_panel(QUERY_ROW_TEMPLATE, next_id, next_y)
 
     next_id += 1
     next_y += 1
 
     # Panel 1: Query Latency Percentiles (p50, p95, p99)
-    panel_latency = {
-        "id": next_id,
-        "gridPos": {"h": 8, "w": 12, "x": 0, "y": next_y},
-        "type": "graph",
-        "title": "Query Latency Percentiles",
-        "description": "Query response time distribution (p50, p95, p99)",
-        "targets": [
-            {
-                "expr": 'histogram_quantile(0.50, rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance"}[5m]))',
-                "legendFormat": "p50 (median)",
-                "refId": "A"
-            },
-            {
-                "expr": 'histogram_quantile(0.95, rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance"}[5m]))',
-                "legendFormat": "p95",
-                "refId": "B"
-            },
-            {
-                "expr": 'histogram_quantile(0.99, rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance"}[5m]))',
-                "legendFormat": "p99",
-                "refId": "C"
-            }
-        ],
-        "yaxes": [
-            {"format": "ms", "label": "Latency"},
-            {"format": "short"}
-        ],
-        "xaxis": {"mode": "time", "show": True},
-        "lines": True,
-        "fill": 0,
-        "linewidth": 2,
-        "pointradius": 2,
-        "points": False,
-        "bars": False,
-        "stack": False,
-        "percentage": False,
-        "legend": {
-            "show": True,
-            "values": True,
-            "current": True,
-            "max": True,
-            "alignAsTable": True
-        },
-        "nullPointMode": "null",
-        "tooltip": {"shared": True, "sort": 0, "value_type": "individual"},
-        "thresholds": [
-            {"value": 100, "colorMode": "critical", "op": "gt", "fill": True, "line": True},
-            {"value": 500, "colorMode": "custom", "op": "gt", "fill": True, "line": True, "fillColor": "rgba(234, 112, 112, 0.2)", "lineColor": "rgb(234, 112, 112)"}
-        ]
-    }
+    panel_latency = new_panel(PANEL_LATENCY_TEMPLATE, next_id, next_y)
 
     next_id += 1
 
     # Panel 2: Slow Query Count (>1s)
-    panel_slow = {
-        "id": next_id,
-        "gridPos": {"h": 8, "w": 12, "x": 12, "y": next_y},
-        "type": "graph",
-        "title": "Slow Queries (>1s)",
-        "description": "Number of queries taking longer than 1 second",
-        "targets": [
-            {
-                "expr": 'sum(rate(solr_metrics_core_query_time_bucket{core=~"$core",instance=~"$instance",le="1000"}[5m])) by (core)',
-                "legendFormat": "{{core}} - queries >1s",
-                "refId": "A"
-            }
-        ],
-        "yaxes": [
-            {"format": "reqps", "label": "Queries/sec"},
-            {"format": "short"}
-        ],
-        "xaxis": {"mode": "time", "show": True},
-        "lines": True,
-        "fill": 2,
-        "linewidth": 2,
-        "pointradius": 2,
-        "points": False,
-        "bars": False,
-        "stack": False,
-        "percentage": False,
-        "legend": {
-            "show": True,
-            "values": True,
-            "current": True,
-            "total": True,
-            "alignAsTable": True
-        },
-        "nullPointMode": "null",
-        "tooltip": {"shared": True, "sort": 2, "value_type": "individual"},
-        "alert": {
-            "name": "High Slow Query Rate",
-            "conditions": [
-                {
-                    "evaluator": {"params": [10], "type": "gt"},
-                    "operator": {"type": "and"},
-                    "query": {"params": ["A", "5m", "now"]},
-                    "reducer": {"params": [], "type": "avg"},
-                    "type": "query"
-                }
-            ],
-            "executionErrorState": "alerting",
-            "frequency": "1m",
-            "handler": 1,
-            "message": "Slow query rate is high",
-            "noDataState": "no_data",
-            "notifications": []
-        }
-    }
+    panel_slow = new_panel(PANEL_SLOW_TEMPLATE, next_id, next_y)
 
     next_id += 1
     next_y += 8
 
     # Panel 3: Query Rate by Type
-    panel_rate = {
-        "id": next_id,
-        "gridPos": {"h": 8, "w": 12, "x": 0, "y": next_y},
-        "type": "graph",
-        "title": "Query Rate by Handler",
-        "description": "Queries per second by request handler",
-        "targets": [
-            {
-                "expr": 'sum(rate(solr_metrics_core_query_requests_total{core=~"$core",instance=~"$instance"}[5m])) by (handler)',
-                "legendFormat": "{{handler}}",
-                "refId": "A"
-            }
-        ],
-        "yaxes": [
-            {"format": "reqps", "label": "Queries/sec"},
-            {"format": "short"}
-        ],
-        "xaxis": {"mode": "time", "show": True},
-        "lines": True,
-        "fill": 1,
-        "linewidth": 2,
-        "pointradius": 2,
-        "points": False,
-        "bars": False,
-        "stack": True,
-        "percentage": False,
-        "legend": {
-            "show": True,
-            "values": True,
-            "current": True,
-            "total": True,
-            "alignAsTable": True
-        },
-        "nullPointMode": "null as zero",
-        "tooltip": {"shared": True, "sort": 2, "value_type": "individual"}
-    }
+    panel_rate = new_panel(PANEL_RATE_TEMPLATE, next_id, next_y)
 
     next_id += 1
 
     # Panel 4: Query Cache Hit Ratio
-    panel_cache = {
-        "id": next_id,
-        "gridPos": {"h": 8, "w": 12, "x": 12, "y": next_y},
-        "type": "stat",
-        "title": "Query Cache Hit Ratio",
-        "description": "Percentage of queries served from cache",
-        "targets": [
-            {
-                "expr": '100 * (rate(solr_metrics_core_query_result_cache_hits_total{core=~"$core",instance=~"$instance"}[5m]) / (rate(solr_metrics_core_query_result_cache_hits_total{core=~"$core",instance=~"$instance"}[5m]) + rate(solr_metrics_core_query_result_cache_misses_total{core=~"$core",instance=~"$instance"}[5m])))',
-                "legendFormat": "{{core}}",
-                "refId": "A"
-            }
-        ],
-        "options": {
-            "reduceOptions": {
-                "values": False,
-                "calcs": ["lastNotNull"],
-                "fields": ""
-            },
-            "orientation": "auto",
-            "textMode": "value_and_name",
-            "colorMode": "value",
-            "graphMode": "area",
-            "justifyMode": "auto"
-        },
-        "fieldConfig": {
-            "defaults": {
-                "unit": "percent",
-                "decimals": 1,
-                "min": 0,
-                "max": 100,
-                "thresholds": {
-                    "mode": "absolute",
-                    "steps": [
-                        {"value": 0, "color": "red"},
-                        {"value": 50, "color": "yellow"},
-                        {"value": 80, "color": "green"}
-                    ]
-                }
-            }
-        }
-    }
+    panel_cache = new_panel(PANEL_CACHE_TEMPLATE, next_id, next_y)
 
     next_id += 1
     next_y += 8
 
     # Panel 5: Average Query Time Trend
-    panel_trend = {
-        "id": next_id,
-        "gridPos": {"h": 8, "w": 24, "x": 0, "y": next_y},
-        "type": "graph",
-        "title": "Average Query Time Trend",
-        "description": "Average query execution time over time by core",
-        "targets": [
-            {
-                "expr": 'rate(solr_metrics_core_query_time_sum{core=~"$core",instance=~"$instance"}[5m]) / rate(solr_metrics_core_query_requests_total{core=~"$core",instance=~"$instance"}[5m])',
-                "legendFormat": "{{core}}",
-                "refId": "A"
-            }
-        ],
-        "yaxes": [
-            {"format": "ms", "label": "Avg Time"},
-            {"format": "short"}
-        ],
-        "xaxis": {"mode": "time", "show": True},
-        "lines": True,
-        "fill": 0,
-        "linewidth": 2,
-        "pointradius": 2,
-        "points": False,
-        "bars": False,
-        "stack": False,
-        "percentage": False,
-        "legend": {
-            "show": True,
-            "values": True,
-            "current": True,
-            "avg": True,
-            "max": True,
-            "alignAsTable": True
-        },
-        "nullPointMode": "null",
-        "tooltip": {"shared": True, "sort": 0, "value_type": "individual"},
-        "thresholds": [
-            {"value": 50, "colorMode": "custom", "op": "gt", "fill": False, "line": True, "lineColor": "rgba(245, 150, 40, 0.8)"},
-            {"value": 100, "colorMode": "custom", "op": "gt", "fill": False, "line": True, "lineColor": "rgba(234, 112, 112, 0.8)"}
-        ]
-    }
+    panel_trend = new_panel(PANEL_TREND_TEMPLATE, next_id, next_y)
 
     # Add all panels to dashboard
-    dashboard["panels"].append(query_row)
-    dashboard["panels"].append(panel_latency)
-    dashboard["panels"].append(panel_slow)
-    dashboard["panels"].append(panel_rate)
-    dashboard["panels"].append(panel_cache)
-    dashboard["panels"].append(panel_trend)
+    dashboard["panels"].extend((query_row, panel_latency, panel_slow, panel_rate, panel_cache, panel_trend))
 
     # Update dashboard metadata
     dashboard["version"] = dashboard.get("version", 0) + 1
@@ -303,18 +338,16 @@ def main():
         sys.exit(1)
 
     # Backup original dashboard
-    backup_path = f"{DASHBOARD_PATH}.backup-query-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    backup_path = f"{DASHBOARD_PATH}.backup-query-{time.strftime('%Y%m%d-%H%M%S')}"
     print(f"📦 Creating backup: {backup_path}")
 
-    with open(DASHBOARD_PATH, 'r') as f:
-        dashboard = json.load(f)
-
-    with open(backup_path, 'w') as f:
-        json.dump(dashboard, f, indent=2)
+    shutil.copy2(DASHBOARD_PATH, backup_path)
 
     print("✅ Backup created")
     print()
 
+    dashboard = load_json(DASHBOARD_PATH)
+
     # Add query performance panels
     print("🔧 Adding query performance panels...")
     dashboard = add_query_performance_panels(dashboard)
@@ -328,8 +361,7 @@ def main():
 
     # Write updated dashboard
     print(f"💾 Writing updated dashboard to {DASHBOARD_PATH}")
-    with open(DASHBOARD_PATH, 'w') as f:
-        json.dump(dashboard, f, indent=2)
+    dump_json(dashboard, DASHBOARD_PATH)
 
     print("✅ Dashboard updated successfully!")
     print()
@@ -12,16 +12,21 @@ This script implements Double SHA-256 hashing:
 5. Base64 encode: hash2 and salt
 6. Format: "HASH_B64 SALT_B64" (hash first, then salt)
 
+Verification only runs steps 2-4 (hash_password_bytes) and compares the
+raw digest with the decoded stored hash; nothing is re-encoded.
+
 Note: This is NOT idempotent by design (random salt).
 For idempotency, use verify_and_reuse() to check existing hashes.
 """
 
 import hashlib
+import hmac
 import base64
 import sys
 import os
 import secrets
 import argparse
+import functools
 import json
 
 
@@ -39,28 +44,23 @@ def generate_random_salt(length=32):
     return secrets.token_bytes(length)
 
 
-def hash_password(password, salt=None):
+def hash_password_bytes(password, salt):
     """
-    Hash password using Double SHA-256 algorithm.
+    Compute the raw Double SHA-256 digest of a salted password.
 
     Algorithm:
-    1. salt_bytes (random or provided)
-    2. password_bytes = password.encode('utf-8')
-    3. combined = salt_bytes + password_bytes  # Binary concatenation
-    4. hash1 = sha256(combined)                 # First SHA-256
-    5. hash2 = sha256(hash1)                    # Second SHA-256 (Double!)
-    6. return "base64(hash2) base64(salt)"      # Hash first, salt second!
+    1. password_bytes = password.encode('utf-8')
+    2. combined = salt_bytes + password_bytes  # Binary concatenation
+    3. hash1 = sha256(combined)                 # First SHA-256
+    4. hash2 = sha256(hash1)                    # Second SHA-256 (Double!)
 
     Args:
         password: Plain text password
-        salt: Optional salt bytes. If None, generates random salt.
+        salt: Salt bytes
 
     Returns:
-        str: Solr hash in format "HASH_B64 SALT_B64"
+        bytes: hash2 (32 bytes)
     """
-    if salt is None:
-        salt = generate_random_salt(32)
-
     # Convert password to bytes
     password_bytes = password.encode('utf-8')
 
@@ -71,7 +71,29 @@ def hash_password(password, salt=None):
     hash1 = hashlib.sha256(combined).digest()
 
     # Second SHA-256 (Double SHA-256!)
-    hash2 = hashlib.sha256(hash1).digest()
+    return hashlib.sha256(hash1).digest()
+
+
+def hash_password(password, salt=None):
+    """
+    Hash password using Double SHA-256 algorithm.
+
+    Algorithm:
+    1. salt_bytes (random or provided)
+    2. hash2 = hash_password_bytes(password, salt_bytes)
+    3. return "base64(hash2) base64(salt)"      # Hash first, salt second!
+
+    Args:
+        password: Plain text password
+        salt: Optional salt bytes. If None, generates random salt.
+
+    Returns:
+        str: Solr hash in format "HASH_B64 SALT_B64"
+    """
+    if salt is None:
+        salt = generate_random_salt(32)
+
+    hash2 = hash_password_bytes(password, salt)
 
     # Base64 encode
     hash_b64 = base64.b64encode(hash2).decode('utf-8')
@@ -86,10 +108,10 @@ def verify_password(password, existing_hash):
     Verify if password matches existing hash.
 
     Algorithm:
-    1. Extract salt from existing hash
-    2. Decode salt from base64
-    3. Hash password with extracted salt
-    4. Compare with existing hash
+    1. Extract hash and salt from existing hash
+    2. Decode both from base64
+    3. Double SHA-256 the password with the extracted salt
+    4. Compare raw hash bytes in constant time
 
     Args:
         password: Plain text password
@@ -106,19 +128,38 @@ def verify_password(password, existing_hash):
 
         hash_b64, salt_b64 = parts
 
-        # Decode salt from base64
-        salt = base64.b64decode(salt_b64)
-
-        # Generate new hash with extracted salt
-        new_hash = hash_password(password, salt=salt)
+        # Decode hash and salt from base64
+        expected = base64.b64decode(hash_b64, validate=True)
+        salt = base64.b64decode(salt_b64, validate=True)
 
-        # Compare
-        return new_hash == existing_hash
+        # Constant-time compare of raw digests
+        return hmac.compare_digest(hash_password_bytes(password, salt), expected)
 
     except Exception:
         return False
 
 
+@functools.lru_cache(maxsize=8)
+def load_credentials(security_json_path, mtime):
+    """
+    Parse the credentials section of security.json.
+
+    Cached per (path, mtime), so repeated lookups against an unchanged
+    file skip the disk read and JSON parse, while edits invalidate it.
+
+    Args:
+        security_json_path: Path to security.json file
+        mtime: Modification time of the file (cache key only)
+
+    Returns:
+        dict: Username -> hash mapping (shared, do not modify)
+    """
+    with open(security_json_path, 'r') as f:
+        security_data = json.load(f)
+
+    return security_data.get('authentication', {}).get('credentials', {})
+
+
 def load_existing_hashes(security_json_path):
     """
     Load existing password hashes from security.json.
@@ -133,11 +174,8 @@ def load_existing_hashes(security_json_path):
         return {}
 
     try:
-        with open(security_json_path, 'r') as f:
-            security_data = json.load(f)
-
-        credentials = security_data.get('authentication', {}).get('credentials', {})
-        return credentials
+        mtime = os.path.getmtime(security_json_path)
+        return dict(load_credentials(security_json_path, mtime))
 
     except (json.JSONDecodeError, IOError):
         return {}
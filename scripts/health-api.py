@@ -21,9 +21,15 @@ import json
 import os
 import sys
 import base64
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.request import urlopen, Request
-from urllib.error import URLError
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from http.client import HTTPConnection, HTTPSConnection, HTTPException, RemoteDisconnected
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
 import socket
 
 SOLR_URL = os.getenv('SOLR_URL', 'http://solr:8983')
@@ -32,18 +38,181 @@ SOLR_ADMIN_USER = os.getenv('SOLR_ADMIN_USER', '')
 SOLR_ADMIN_PASSWORD = os.getenv('SOLR_ADMIN_PASSWORD', '')
 PORT = 8888
 
+# Basic auth header, encoded once since the credentials never change
+AUTH_HEADER = None
+if SOLR_ADMIN_USER and SOLR_ADMIN_PASSWORD:
+    AUTH_HEADER = "Basic " + base64.b64encode(f"{SOLR_ADMIN_USER}:{SOLR_ADMIN_PASSWORD}".encode()).decode()
 
-def create_auth_request(url, timeout=5):
-    """Create authenticated request if credentials are provided"""
-    request = Request(url)
-    if SOLR_ADMIN_USER and SOLR_ADMIN_PASSWORD:
-        credentials = f"{SOLR_ADMIN_USER}:{SOLR_ADMIN_PASSWORD}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        request.add_header("Authorization", f"Basic {encoded_credentials}")
-    return urlopen(request, timeout=timeout)
+# Keep-alive connections to Solr, shared by all requests
+SOLR_ENDPOINT = urlsplit(SOLR_URL)
+SOLR_CONNECTION_CLASS = HTTPSConnection if SOLR_ENDPOINT.scheme == 'https' else HTTPConnection
+SOLR_POOL_SIZE = 4
+SOLR_POOL = queue.LifoQueue(maxsize=SOLR_POOL_SIZE)
+
+# Errors that mean Solr dropped an idle pooled connection; anything else
+# (timeouts included) is reported immediately
+STALE_CONNECTION_ERRORS = (RemoteDisconnected, ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+# Cache for slow-changing Solr data; the ping in check_solr is never cached
+CORES_CACHE_TTL = 10
+SYSTEM_INFO_CACHE_TTL = 30
+CACHE = {}
+CACHE_PENDING = {}  # key -> Future of the in-flight fetch
+CACHE_LOCK = threading.Lock()
+
+# Workers for fetching system info alongside the cores fetch on the handler
+# thread; sized for concurrent probes so requests do not queue behind each other
+SOLR_EXECUTOR_WORKERS = 16
+SOLR_EXECUTOR = ThreadPoolExecutor(max_workers=SOLR_EXECUTOR_WORKERS)
+
+
+def release_connection(conn, response):
+    """Return a drained connection to the pool, or close it if it cannot be reused"""
+    if response.will_close:
+        conn.close()
+        return
+    try:
+        SOLR_POOL.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+@contextmanager
+def create_auth_request(path, timeout=5):
+    """
+    Send an authenticated GET for a Solr path over a pooled keep-alive connection.
+
+    Yields the HTTP response. Errors are raised as URLError/HTTPError, like urlopen.
+    """
+    headers = {}
+    if AUTH_HEADER:
+        headers["Authorization"] = AUTH_HEADER
+
+    request_path = SOLR_ENDPOINT.path.rstrip('/') + path
+    try:
+        conn = SOLR_POOL.get_nowait()
+    except queue.Empty:
+        conn = None
+
+    while True:
+        reused = conn is not None
+        if not reused:
+            conn = SOLR_CONNECTION_CLASS(SOLR_ENDPOINT.netloc, timeout=timeout)
+
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+        try:
+            conn.request('GET', request_path, headers=headers)
+            response = conn.getresponse()
+            break
+        except STALE_CONNECTION_ERRORS as e:
+            conn.close()
+            if not reused:
+                raise URLError(e)
+            # Solr closed an idle keep-alive connection, retry once on a fresh one
+            conn = None
+        except (OSError, HTTPException) as e:
+            conn.close()
+            raise URLError(e)
+
+    if response.status >= 400:
+        response.read()
+        release_connection(conn, response)
+        raise HTTPError(f"{SOLR_URL}{path}", response.status, response.reason, response.headers, None)
+
+    try:
+        yield response
+        response.read()
+    except BaseException:
+        conn.close()
+        raise
+
+    release_connection(conn, response)
+
+
+def cached(key, ttl, fetch):
+    """
+    Return the result of fetch(), reusing it for ttl seconds.
+
+    Only one caller fetches a given key at a time. While a refresh is in
+    flight, other callers get the stale value, or wait for the result if
+    there is none yet. Exceptions are not cached, so a failed fetch is
+    retried on the next call.
+    """
+    with CACHE_LOCK:
+        entry = CACHE.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        pending = CACHE_PENDING.get(key)
+        owner = pending is None
+        if owner:
+            pending = CACHE_PENDING[key] = Future()
+
+    if not owner:
+        if entry:
+            return entry[1]
+        return pending.result()
+
+    try:
+        value = fetch()
+    except BaseException as e:
+        with CACHE_LOCK:
+            del CACHE_PENDING[key]
+        pending.set_exception(e)
+        raise
+
+    with CACHE_LOCK:
+        CACHE[key] = (time.monotonic() + ttl, value)
+        del CACHE_PENDING[key]
+    pending.set_result(value)
+    return value
+
+
+def fetch_cores():
+    """Fetch the list of Solr cores"""
+    with create_auth_request("/solr/admin/cores?action=STATUS&wt=json") as response:
+        data = json.load(response)
+    cores = []
+
+    for core_name, core_data in data.get("status", {}).items():
+        if core_name:  # Skip empty keys
+            cores.append({
+                "name": core_name,
+                "num_docs": core_data.get("index", {}).get("numDocs", 0),
+                "size_mb": round(core_data.get("index", {}).get("sizeInBytes", 0) / 1024 / 1024, 2),
+                "last_modified": core_data.get("index", {}).get("lastModified", "unknown")
+            })
+
+    return cores
+
+
+def fetch_system_info():
+    """Fetch Solr system information"""
+    with create_auth_request("/solr/admin/info/system?wt=json") as response:
+        data = json.load(response)
+
+    jvm = data.get("jvm", {})
+    memory = jvm.get("memory", {}).get("raw", {})
+
+    return {
+        "solr_version": data.get("lucene", {}).get("solr-spec-version", "unknown"),
+        "jvm_version": jvm.get("version", "unknown"),
+        "memory": {
+            "used_mb": round(memory.get("used", 0) / 1024 / 1024, 2),
+            "total_mb": round(memory.get("total", 0) / 1024 / 1024, 2),
+            "max_mb": round(memory.get("max", 0) / 1024 / 1024, 2),
+            "usage_percent": round((memory.get("used", 0) / memory.get("max", 1)) * 100, 2) if memory.get("max") else 0
+        },
+        "uptime_seconds": data.get("jvm", {}).get("jmx", {}).get("upTimeMS", 0) // 1000
+    }
 
 
 class HealthHandler(BaseHTTPRequestHandler):
+    # Buffer the response so status line, headers and body go out in one send
+    wbufsize = 8192
+
     def log_message(self, format, *args):
         """Suppress default logging"""
         pass
@@ -56,12 +225,18 @@ class HealthHandler(BaseHTTPRequestHandler):
         else:
             self.send_error(404, "Not Found")
 
-    def handle_ping(self):
-        """Simple ping endpoint"""
-        self.send_response(200)
+    def send_json(self, status_code, data, indent=None):
+        """Send a JSON response with an explicit Content-Length"""
+        body = json.dumps(data, indent=indent).encode()
+        self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps({"status": "ok"}).encode())
+        self.wfile.write(body)
+
+    def handle_ping(self):
+        """Simple ping endpoint"""
+        self.send_json(200, {"status": "ok"})
 
     def handle_health(self):
         """Comprehensive health check"""
@@ -83,13 +258,10 @@ class HealthHandler(BaseHTTPRequestHandler):
             if solr_health.get("available"):
                 health_data["status"] = "healthy"
 
-                # Get cores information
-                cores = self.get_cores()
-                health_data["cores"] = cores
-
-                # Get system info
-                system_info = self.get_system_info()
-                health_data["system"] = system_info
+                # Get system info in the background while fetching cores here
+                system_info = SOLR_EXECUTOR.submit(self.get_system_info)
+                health_data["cores"] = self.get_cores()
+                health_data["system"] = system_info.result()
             else:
                 health_data["status"] = "unhealthy"
                 health_data["errors"].append("Solr is not available")
@@ -100,16 +272,13 @@ class HealthHandler(BaseHTTPRequestHandler):
 
         # Send response
         status_code = 200 if health_data["status"] == "healthy" else 503
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(health_data, indent=2).encode())
+        self.send_json(status_code, health_data, indent=2)
 
     def check_solr(self):
         """Check if Solr is responding"""
         try:
-            response = create_auth_request(f"{SOLR_URL}/solr/admin/ping?wt=json")
-            data = json.loads(response.read())
+            with create_auth_request("/solr/admin/ping?wt=json") as response:
+                data = json.load(response)
             return {
                 "available": True,
                 "status": data.get("status"),
@@ -129,43 +298,14 @@ class HealthHandler(BaseHTTPRequestHandler):
     def get_cores(self):
         """Get list of Solr cores"""
         try:
-            response = create_auth_request(f"{SOLR_URL}/solr/admin/cores?action=STATUS&wt=json")
-            data = json.loads(response.read())
-            cores = []
-
-            for core_name, core_data in data.get("status", {}).items():
-                if core_name:  # Skip empty keys
-                    cores.append({
-                        "name": core_name,
-                        "num_docs": core_data.get("index", {}).get("numDocs", 0),
-                        "size_mb": round(core_data.get("index", {}).get("sizeInBytes", 0) / 1024 / 1024, 2),
-                        "last_modified": core_data.get("index", {}).get("lastModified", "unknown")
-                    })
-
-            return cores
+            return cached("cores", CORES_CACHE_TTL, fetch_cores)
         except Exception as e:
             return [{"error": str(e)}]
 
     def get_system_info(self):
         """Get Solr system information"""
         try:
-            response = create_auth_request(f"{SOLR_URL}/solr/admin/info/system?wt=json")
-            data = json.loads(response.read())
-
-            jvm = data.get("jvm", {})
-            memory = jvm.get("memory", {}).get("raw", {})
-
-            return {
-                "solr_version": data.get("lucene", {}).get("solr-spec-version", "unknown"),
-                "jvm_version": jvm.get("version", "unknown"),
-                "memory": {
-                    "used_mb": round(memory.get("used", 0) / 1024 / 1024, 2),
-                    "total_mb": round(memory.get("total", 0) / 1024 / 1024, 2),
-                    "max_mb": round(memory.get("max", 0) / 1024 / 1024, 2),
-                    "usage_percent": round((memory.get("used", 0) / memory.get("max", 1)) * 100, 2) if memory.get("max") else 0
-                },
-                "uptime_seconds": data.get("jvm", {}).get("jmx", {}).get("upTimeMS", 0) // 1000
-            }
+            return cached("system", SYSTEM_INFO_CACHE_TTL, fetch_system_info)
         except Exception as e:
             return {"error": str(e)}
 
@@ -173,7 +313,7 @@ class HealthHandler(BaseHTTPRequestHandler):
 def main():
     """Start health API server"""
     server_address = ('', PORT)
-    httpd = HTTPServer(server_address, HealthHandler)
+    httpd = ThreadingHTTPServer(server_address, HealthHandler)
 
     print(f"Health API starting on port {PORT}")
     print(f"Solr URL: {SOLR_URL}")
@@ -0,0 +1,17 @@
+"""
+Dashboard JSON helpers shared by the Grafana dashboard scripts.
+"""
+
+import json
+
+
+def load_json(path):
+    """Read a JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def dump_json(data, path):
+    """Write a JSON file with 2-space indent in a single write"""
+    with open(path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.write(json.dumps(data, indent=2))